@@ -1,11 +1,71 @@
 # debug_lsl_stream.py
-from pylsl import resolve_streams, StreamInlet
+from pylsl import (resolve_streams, StreamInlet,
+                   cf_float32, cf_double64, cf_int8, cf_int16, cf_int32, cf_int64)
+from contextlib import contextmanager
+import os
+import queue
+import sys
+import threading
 import time
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; drift analysis falls back to plain numpy
+    njit = None
+
 stream_name = "SynAmps_RT_EEG"
 #stream_name = "SynAmpsRT"
 
+target_interval = 0.05  # Seconds of data to aim for per pull_chunk call
+max_queued_chunks = 256  # Bound on chunks waiting between the pull thread and the analysis
+description_fields = ["manufacturer", "model", "subject", "session", "experiment"]
+
+# numpy dtype matching each numeric LSL channel format, so liblsl can copy samples without conversion
+channel_dtypes = {
+    cf_float32: np.float32,
+    cf_double64: np.float64,
+    cf_int8: np.int8,
+    cf_int16: np.int16,
+    cf_int32: np.int32,
+    cf_int64: np.int64,
+}
+
+def _child_value(node, name):
+    """Return the text value of node's child element, or None if it is missing."""
+    child = node.child(name)
+    if child.empty():
+        return None
+    value = child.first_child()
+    return None if value.empty() else value.value()
+
+def _walk_channels(desc):
+    """Walk the <channels> element once and return a list of {label, unit, type} dicts."""
+    chans = []
+    channels = desc.child("channels")
+    if channels.empty():
+        return chans
+    channel = channels.first_child()
+    while not channel.empty():
+        chans.append({
+            'label': _child_value(channel, "label"),
+            'unit': _child_value(channel, "unit"),
+            'type': _child_value(channel, "type"),
+        })
+        channel = channel.next_sibling()
+    return chans
+
+def _walk_description(desc, fields):
+    """Collect the flat description fields that are present, in field order."""
+    values = {}
+    if desc.empty():
+        return values
+    for field in fields:
+        value = _child_value(desc, field)
+        if value is not None:
+            values[field] = value
+    return values
+
 def debug_lsl_stream(stream_name=stream_name):
     """Debug and inspect an LSL stream with comprehensive metadata extraction."""
     
@@ -28,9 +88,9 @@ def debug_lsl_stream(stream_name=stream_name):
         print(f"    Session ID: {stream.session_id()}")
     
     # Try to connect to the specific stream
-    target_streams = [s for s in streams if s.name() == stream_name]
+    stream = next((s for s in streams if s.name() == stream_name), None)
     
-    if not target_streams:
+    if stream is None:
         print(f"\n❌ Stream '{stream_name}' not found!")
         print("Available streams:")
         for stream in streams:
@@ -38,11 +98,10 @@ def debug_lsl_stream(stream_name=stream_name):
         return False, None, None
     
     print(f"\n✅ Found target stream: {stream_name}")
-    stream = target_streams[0]
     
     # Create inlet to get FULL metadata
     try:
-        inlet = StreamInlet(stream)
+        inlet = StreamInlet(stream, max_buflen=10)  # Only a handful of samples are pulled here
         print("✓ StreamInlet created successfully")
         
         # Get complete stream info
@@ -59,53 +118,38 @@ def debug_lsl_stream(stream_name=stream_name):
         print(f"  UID: {info.uid()}")
         print(f"  Session ID: {info.session_id()}")
         
+        # Read the XML metadata in a single pass, then format from plain Python data
+        desc = info.desc()
+        chans = _walk_channels(desc)
+        description = _walk_description(desc, description_fields)
+        
         # Channel-specific information
         print(f"\n🎛️  CHANNEL INFORMATION:")
-        desc = info.desc()
-        channels = desc.child("channels")
-        if channels.empty():
+        if not chans:
             print("  No detailed channel information available")
         else:
-            channel = channels.first_child()
-            ch_idx = 0
-            while not channel.empty():
-                print(f"  Channel {ch_idx}:")
-                name = channel.child("label")
-                if not name.empty():
-                    print(f"    Label: {name.first_child().value()}")
-                unit = channel.child("unit")
-                if not unit.empty():
-                    print(f"    Unit: {unit.first_child().value()}")
-                type_node = channel.child("type")
-                if not type_node.empty():
-                    print(f"    Type: {type_node.first_child().value()}")
-                channel = channel.next_sibling()
-                ch_idx += 1
+            # Build the whole dump first and write it once instead of one print per field
+            lines = []
+            for ch_idx, chan in enumerate(chans):
+                lines.append(f"  Channel {ch_idx}:")
+                if chan['label'] is not None:
+                    lines.append(f"    Label: {chan['label']}")
+                if chan['unit'] is not None:
+                    lines.append(f"    Unit: {chan['unit']}")
+                if chan['type'] is not None:
+                    lines.append(f"    Type: {chan['type']}")
+            sys.stdout.write("\n".join(lines) + "\n")
         
         # Stream description/metadata
         print(f"\n📋 STREAM DESCRIPTION:")
-        if not desc.empty():
-            # Try to get various description fields
-            for field in ["manufacturer", "model", "subject", "session", "experiment"]:
-                node = desc.child(field)
-                if not node.empty():
-                    value = node.first_child()
-                    if not value.empty():
-                        print(f"  {field.capitalize()}: {value.value()}")
+        for field, value in description.items():
+            print(f"  {field.capitalize()}: {value}")
         
         # Get channel names if available
         print(f"\n🔤 CHANNEL NAMES:")
-        ch_names = []
-        channels = desc.child("channels")
-        if not channels.empty():
-            channel = channels.first_child()
-            while not channel.empty():
-                name = channel.child("label")
-                if not name.empty():
-                    ch_name = name.first_child().value()
-                    ch_names.append(ch_name)
-                    print(f"  Channel {len(ch_names)-1}: {ch_name}")
-                channel = channel.next_sibling()
+        ch_names = [chan['label'] for chan in chans if chan['label'] is not None]
+        if ch_names:
+            sys.stdout.write("\n".join(f"  Channel {i}: {name}" for i, name in enumerate(ch_names)) + "\n")
         
         if not ch_names:
             print("  Using default channel names (no labels in stream)")
@@ -121,10 +165,12 @@ def debug_lsl_stream(stream_name=stream_name):
             
             # Test multiple samples
             print(f"\n🔄 TESTING CONTINUOUS DATA:")
-            samples, timestamps = inlet.pull_chunk(timeout=2.0, max_samples=10)
-            if samples:
-                print(f"✓ Received {len(samples)} samples in chunk")
-                print(f"  Sample shape: {len(samples)}x{len(samples[0])}")
+            data_buf = _pull_buffer(inlet.channel_count, 10, inlet.channel_format)
+            _, timestamps = inlet.pull_chunk(timeout=2.0, max_samples=10, dest_obj=data_buf)
+            n = len(timestamps)
+            if n:
+                print(f"✓ Received {n} samples in chunk")
+                print(f"  Sample shape: {n}x{inlet.channel_count}")
                 print(f"  Timestamps range: {timestamps[0]:.3f} to {timestamps[-1]:.3f}")
             else:
                 print("❌ No chunk data received")
@@ -140,91 +186,310 @@ def debug_lsl_stream(stream_name=stream_name):
         traceback.print_exc()
         return False, None, None
 
-def analyze_sample_rate_drift(timestamps, nominal_rate, duration):
-    """Analyze sample rate drift from timestamp data."""
-    if len(timestamps) < 2:
-        return {"error": "Insufficient timestamps for drift analysis"}
+def _chunk_max_samples(nominal_rate, interval=target_interval):
+    """Size pull_chunk's max_samples to hold about one interval of data at the nominal rate."""
+    return max(256, int(nominal_rate * interval * 1.5))
+
+def _pull_buffer(n_channels, max_samples, channel_format=cf_float32):
+    """Allocate a dest_obj buffer for pull_chunk, reused across one collector's pulls.
+    
+    Returns None for string streams, which pylsl cannot pull into a numpy buffer.
+    """
+    dtype = channel_dtypes.get(channel_format)
+    if dtype is None:
+        return None
+    return np.empty((max_samples, n_channels), dtype=dtype)
+
+def _open_inlet(stream_name, duration, inlet=None, nominal_rate=None):
+    """Return (inlet, nominal_rate) for a measurement, or (None, None) if the stream is missing.
+    
+    A supplied inlet is flushed and reused; otherwise the stream is resolved by name.
+    """
+    if inlet is not None:
+        inlet.flush()  # Drop samples queued since the previous measurement
+        if nominal_rate is None:
+            nominal_rate = inlet.info().nominal_srate()
+        return inlet, nominal_rate
+    
+    target = next((s for s in resolve_streams() if s.name() == stream_name), None)
+    if target is None:
+        return None, None
+    
+    nominal_rate = target.nominal_srate()
+    # Bound the inlet buffer to the measurement instead of liblsl's 6 minute default
+    inlet = StreamInlet(target, max_buflen=int(max(duration, 10)),
+                        max_chunklen=_chunk_max_samples(nominal_rate), recover=False)
+    return inlet, nominal_rate
+
+def _pull_producer(inlet, data_buf, max_samples, deadline, chunks, errors):
+    """Pull chunks until deadline, queueing (timestamps, pull_ns) and a final (None, end_ns).
+    
+    An exception from pull_chunk (e.g. LostError) ends the pull and is appended to
+    errors, for the consumer to re-raise once it has drained the queue.
+    """
+    # One clock read per iteration: the end of each pull is the start of the next.
+    # This thread only pulls; bookkeeping happens in the consumer, and neither side
+    # does terminal I/O until collection ends.
+    chunk_end = time.monotonic_ns()
+    try:
+        while chunk_end < deadline:
+            chunk_start = chunk_end
+            _, timestamps = inlet.pull_chunk(timeout=target_interval, max_samples=max_samples, dest_obj=data_buf)
+            chunk_end = time.monotonic_ns()
+            if timestamps:
+                chunks.put((timestamps, chunk_end - chunk_start))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        chunks.put((None, chunk_end))
+
+@contextmanager
+def _realtime_priority(priority=20):
+    """Pin the calling thread to one CPU and run it SCHED_FIFO, restoring both on exit.
+    
+    Best effort: SCHED_FIFO usually needs root or CAP_SYS_NICE, and neither call exists
+    outside Linux, so anything that fails is reported and skipped.
+    """
+    saved_affinity = saved_policy = saved_param = None
+    try:
+        saved_affinity = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, {max(saved_affinity)})
+    except (AttributeError, OSError) as e:
+        saved_affinity = None
+        print(f"  (CPU pinning unavailable: {e})")
+    try:
+        saved_policy = os.sched_getscheduler(0)
+        saved_param = os.sched_getparam(0)
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+    except (AttributeError, OSError) as e:
+        saved_policy = None
+        print(f"  (Real-time scheduling unavailable: {e})")
+    try:
+        yield
+    finally:
+        if saved_policy is not None:
+            os.sched_setscheduler(0, saved_policy, saved_param)
+        if saved_affinity is not None:
+            os.sched_setaffinity(0, saved_affinity)
+
+def _append_timestamps(ts_buf, idx, timestamps):
+    """Copy a chunk of timestamps into ts_buf at idx, growing the buffer if needed."""
+    k = len(timestamps)
+    if idx + k > len(ts_buf):
+        grown = np.empty(max(2 * len(ts_buf), idx + k), dtype=np.float64)
+        grown[:idx] = ts_buf[:idx]
+        ts_buf = grown
+    ts_buf[idx:idx + k] = timestamps
+    return ts_buf, idx + k
+
+def _drift_kernel(timestamps):
+    """Return interval mean/std and instantaneous rate mean/std/min/max for float64 timestamps."""
+    intervals = np.diff(timestamps)
+    intervals_mean = intervals.mean()
+    intervals_std = intervals.std()
+    rates = np.reciprocal(intervals, out=intervals)  # Reuse the interval buffer for the rates
+    return intervals_mean, intervals_std, rates.mean(), rates.std(), rates.min(), rates.max()
+
+def _drift_kernel_loop(timestamps):
+    """Loop form of _drift_kernel for numba: no temporary arrays, reductions fused per pass."""
+    n = timestamps.shape[0] - 1
+    sum_i = 0.0
+    sum_r = 0.0
+    min_r = np.inf
+    max_r = -np.inf
+    for k in range(n):
+        d = timestamps[k + 1] - timestamps[k]
+        r = 1.0 / d
+        sum_i += d
+        sum_r += r
+        min_r = min(min_r, r)
+        max_r = max(max_r, r)
+    mean_i = sum_i / n
+    mean_r = sum_r / n
     
-    # Calculate actual sample rates between consecutive samples
-    inter_sample_intervals = np.diff(timestamps)
-    instantaneous_rates = 1.0 / inter_sample_intervals
+    # Second pass for the spread, matching np.std's numerics
+    var_i = 0.0
+    var_r = 0.0
+    for k in range(n):
+        d = timestamps[k + 1] - timestamps[k]
+        var_i += (d - mean_i) ** 2
+        var_r += (1.0 / d - mean_r) ** 2
+    return mean_i, np.sqrt(var_i / n), mean_r, np.sqrt(var_r / n), min_r, max_r
+
+if njit is not None:
+    # Reassociation lets LLVM vectorize the reductions; inf/nan semantics stay intact
+    _drift_kernel = njit(cache=True, fastmath={'reassoc', 'contract', 'arcp'},
+                         error_model='numpy')(_drift_kernel_loop)
+
+def _drift_stats(nominal_rate, n_samples, first_ts, last_ts, interval_stats):
+    """Build the drift statistics dict from sample count, time span and _drift_kernel output."""
+    (intervals_mean, intervals_std,
+     rates_mean, rates_std, rates_min, rates_max) = interval_stats
     
     # Calculate expected vs actual timing
-    expected_duration = len(timestamps) / nominal_rate
-    actual_duration = timestamps[-1] - timestamps[0]
+    expected_duration = n_samples / nominal_rate
+    actual_duration = last_ts - first_ts
     total_drift = actual_duration - expected_duration
     drift_ppm = (total_drift / expected_duration) * 1e6  # Parts per million
+    actual_mean_rate = n_samples / actual_duration
     
     # Statistics
     stats = {
         'nominal_rate': nominal_rate,
-        'actual_mean_rate': len(timestamps) / actual_duration,
-        'rate_error_percent': ((len(timestamps) / actual_duration - nominal_rate) / nominal_rate) * 100,
+        'actual_mean_rate': actual_mean_rate,
+        'rate_error_percent': ((actual_mean_rate - nominal_rate) / nominal_rate) * 100,
         'total_drift_seconds': total_drift,
         'drift_ppm': drift_ppm,
         'drift_per_minute': (total_drift / actual_duration) * 60,  # seconds per minute
-        'instantaneous_rates_mean': np.mean(instantaneous_rates),
-        'instantaneous_rates_std': np.std(instantaneous_rates),
-        'instantaneous_rates_min': np.min(instantaneous_rates),
-        'instantaneous_rates_max': np.max(instantaneous_rates),
-        'intervals_mean': np.mean(inter_sample_intervals),
-        'intervals_std': np.std(inter_sample_intervals),
-        'intervals_cv': (np.std(inter_sample_intervals) / np.mean(inter_sample_intervals)) * 100,
-        'jitter_ms': np.std(inter_sample_intervals) * 1000,  # RMS jitter in milliseconds
-        'n_samples': len(timestamps),
+        'instantaneous_rates_mean': rates_mean,
+        'instantaneous_rates_std': rates_std,
+        'instantaneous_rates_min': rates_min,
+        'instantaneous_rates_max': rates_max,
+        'intervals_mean': intervals_mean,
+        'intervals_std': intervals_std,
+        'intervals_cv': (intervals_std / intervals_mean) * 100,
+        'jitter_ms': intervals_std * 1000,  # RMS jitter in milliseconds
+        'n_samples': n_samples,
         'duration_actual': actual_duration,
         'duration_expected': expected_duration
     }
     
     return stats
 
-def print_stream_statistics(stream_name=stream_name, duration=10):
-    """Collect and print stream statistics over time with proper timing."""
+def analyze_sample_rate_drift(timestamps, nominal_rate, duration):
+    """Analyze sample rate drift from timestamp data."""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    n_samples = len(timestamps)
+    if n_samples < 2:
+        return {"error": "Insufficient timestamps for drift analysis"}
+    
+    # Interval and instantaneous rate statistics (numba-compiled when available)
+    return _drift_stats(nominal_rate, n_samples, timestamps[0], timestamps[-1],
+                        _drift_kernel(timestamps))
+
+def _new_drift_moments():
+    """Empty running moments for streaming drift analysis; each series is [count, mean, M2, min, max]."""
+    return {
+        'n_samples': 0,
+        'first_ts': None,
+        'last_ts': None,
+        'intervals': [0, 0.0, 0.0, np.inf, -np.inf],
+        'rates': [0, 0.0, 0.0, np.inf, -np.inf],
+    }
+
+def _merge_moments(acc, values):
+    """Fold an array into [count, mean, M2, min, max] using the pairwise (Chan et al.) update."""
+    n_b = len(values)
+    mean_b = values.mean()
+    m2_b = np.square(values - mean_b).sum()
+    n_a, mean_a, m2_a, min_a, max_a = acc
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    acc[0] = n
+    acc[1] = mean_a + delta * n_b / n
+    acc[2] = m2_a + m2_b + delta * delta * n_a * n_b / n
+    acc[3] = min(min_a, values.min())
+    acc[4] = max(max_a, values.max())
+
+def _update_drift_moments(moments, timestamps):
+    """Fold one chunk of timestamps into the running moments, including the gap to the previous chunk."""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if moments['last_ts'] is None:
+        moments['first_ts'] = timestamps[0]
+        intervals = np.diff(timestamps)
+    else:
+        intervals = np.diff(timestamps, prepend=moments['last_ts'])
+    moments['last_ts'] = timestamps[-1]
+    moments['n_samples'] += len(timestamps)
+    if len(intervals):
+        _merge_moments(moments['intervals'], intervals)
+        _merge_moments(moments['rates'], np.reciprocal(intervals, out=intervals))
+
+def analyze_drift_moments(moments, nominal_rate):
+    """Analyze sample rate drift from running moments collected with _update_drift_moments."""
+    if moments['n_samples'] < 2:
+        return {"error": "Insufficient timestamps for drift analysis"}
+    
+    n_i, mean_i, m2_i, _, _ = moments['intervals']
+    n_r, mean_r, m2_r, min_r, max_r = moments['rates']
+    interval_stats = (mean_i, np.sqrt(m2_i / n_i), mean_r, np.sqrt(m2_r / n_r), min_r, max_r)
+    return _drift_stats(nominal_rate, moments['n_samples'], moments['first_ts'], moments['last_ts'],
+                        interval_stats)
+
+def print_stream_statistics(stream_name=stream_name, duration=10, *, inlet=None, nominal_rate=None):
+    """Collect and print stream statistics over time with proper timing.
+    
+    Pass an already open inlet to skip stream discovery and inlet creation.
+    """
     print(f"\n📈 COLLECTING STATISTICS FOR {duration} SECONDS:")
     
-    target_streams = [s for s in resolve_streams() if s.name() == stream_name]
-    if not target_streams:
+    inlet, nominal_rate = _open_inlet(stream_name, duration, inlet, nominal_rate)
+    if inlet is None:
         print(f"Stream '{stream_name}' not found for statistics")
         return
     
-    inlet = StreamInlet(target_streams[0])
-    nominal_rate = target_streams[0].nominal_srate()
-    start_time = time.time()
-    end_time = start_time + duration
+    # Pull into a preallocated buffer so pylsl skips building list-of-lists per chunk
+    max_samples = _chunk_max_samples(nominal_rate)
+    data_buf = _pull_buffer(inlet.channel_count, max_samples, inlet.channel_format)
     
+    start_ns = time.monotonic_ns()
+    deadline = start_ns + int(duration * 1e9)
+    
+    # Running totals instead of per-chunk lists
     sample_count = 0
-    chunk_counts = []
-    chunk_timings = []
-    all_timestamps = []  # Store all timestamps for drift analysis
+    n_chunks = 0
+    min_chunk = None
+    max_chunk = 0
+    chunk_timing_total = 0  # nanoseconds
+    # Store all timestamps for drift analysis, sized for the expected sample count
+    ts_buf = np.empty(int(nominal_rate * duration * 1.2) + max_samples, dtype=np.float64)
+    ts_idx = 0
     
     print("  Collecting data...", end="", flush=True)
     
-    while time.time() < end_time:
-        chunk_start = time.time()
-        samples, timestamps = inlet.pull_chunk(timeout=0.1)  # Smaller timeout for more frequent updates
-        chunk_end = time.time()
+    # Pull on a background thread so the inlet keeps draining while chunks are processed here
+    chunks = queue.Queue(maxsize=max_queued_chunks)
+    errors = []
+    producer = threading.Thread(target=_pull_producer,
+                                args=(inlet, data_buf, max_samples, deadline, chunks, errors), daemon=True)
+    producer.start()
+    
+    # No terminal I/O inside the collection loop
+    while True:
+        timestamps, pull_ns = chunks.get()
+        if timestamps is None:
+            chunk_end = pull_ns
+            break
         
-        if samples:
-            chunk_counts.append(len(samples))
-            sample_count += len(samples)
-            chunk_timings.append(chunk_end - chunk_start)
-            all_timestamps.extend(timestamps)
+        n = len(timestamps)
+        sample_count += n
+        n_chunks += 1
+        if min_chunk is None or n < min_chunk:
+            min_chunk = n
+        if n > max_chunk:
+            max_chunk = n
+        chunk_timing_total += pull_ns
+        ts_buf, ts_idx = _append_timestamps(ts_buf, ts_idx, timestamps)
     
-    actual_duration = time.time() - start_time
+    producer.join()
+    if errors:
+        raise errors[0]  # Surface a lost stream to the caller instead of reporting a short run
+    actual_duration = (chunk_end - start_ns) / 1e9
+    all_timestamps = ts_buf[:ts_idx]
     
-    if chunk_counts:
+    if n_chunks:
         print(" Done!")
         print(f"  Actual collection time: {actual_duration:.2f} seconds")
         print(f"  Total samples: {sample_count}")
-        print(f"  Total chunks: {len(chunk_counts)}")
+        print(f"  Total chunks: {n_chunks}")
         print(f"  Average samples/sec: {sample_count/actual_duration:.1f}")
-        print(f"  Average chunk size: {sum(chunk_counts)/len(chunk_counts):.1f}")
-        print(f"  Chunks/sec: {len(chunk_counts)/actual_duration:.1f}")
+        print(f"  Average chunk size: {sample_count/n_chunks:.1f}")
+        print(f"  Chunks/sec: {n_chunks/actual_duration:.1f}")
         
         # Additional statistics
-        if len(chunk_counts) > 1:
-            print(f"  Chunk size range: {min(chunk_counts)} - {max(chunk_counts)}")
-            print(f"  Average chunk interval: {sum(chunk_timings)/len(chunk_timings)*1000:.1f} ms")
+        if n_chunks > 1:
+            print(f"  Chunk size range: {min_chunk} - {max_chunk}")
+            print(f"  Average chunk interval: {chunk_timing_total/n_chunks/1e6:.1f} ms")
             
         # Compare with nominal rate
         if nominal_rate > 0:
@@ -260,39 +525,47 @@ def print_stream_statistics(stream_name=stream_name, duration=10):
     else:
         print(" No data received during statistics collection")
 
-def test_stream_performance(stream_name=stream_name, test_duration=5):
-    """Alternative performance test with more detailed metrics."""
+def test_stream_performance(stream_name=stream_name, test_duration=5, *, inlet=None, nominal_rate=None):
+    """Alternative performance test with more detailed metrics.
+    
+    Pass an already open inlet to skip stream discovery and inlet creation.
+    """
     print(f"\n⚡ PERFORMANCE TEST FOR {test_duration} SECONDS:")
     
-    target_streams = [s for s in resolve_streams() if s.name() == stream_name]
-    if not target_streams:
+    inlet, nominal_rate = _open_inlet(stream_name, test_duration, inlet, nominal_rate)
+    if inlet is None:
         print(f"Stream '{stream_name}' not found")
         return
     
-    inlet = StreamInlet(target_streams[0])
-    nominal_rate = target_streams[0].nominal_srate()
-    
     # Test parameters
     test_intervals = [0.01, 0.05, 0.1, 0.5]  # Different timeout intervals to test
+    
+    # Preallocated pull buffer, large enough for the longest interval
+    max_samples = _chunk_max_samples(nominal_rate, max(test_intervals))
+    data_buf = _pull_buffer(inlet.channel_count, max_samples, inlet.channel_format)
+    # Timestamp buffer is shared by all intervals; each run overwrites it from the start
+    ts_buf = np.empty(int(nominal_rate * test_duration * 1.3) + max_samples, dtype=np.float64)
+    
     results = {}
     
     for interval in test_intervals:
         print(f"  Testing with {interval*1000:.0f}ms intervals...", end="", flush=True)
-        start_time = time.time()
-        end_time = start_time + test_duration
+        start_ns = time.monotonic_ns()
+        deadline = start_ns + int(test_duration * 1e9)
         samples_received = 0
         chunks_received = 0
-        timestamps = []
+        ts_idx = 0
         
-        while time.time() < end_time:
-            samples, chunk_timestamps = inlet.pull_chunk(timeout=interval, max_samples=1000)
-            if samples:
-                samples_received += len(samples)
+        # No terminal I/O inside the collection loop
+        while (now := time.monotonic_ns()) < deadline:
+            _, chunk_timestamps = inlet.pull_chunk(timeout=interval, max_samples=max_samples, dest_obj=data_buf)
+            if chunk_timestamps:
+                samples_received += len(chunk_timestamps)
                 chunks_received += 1
-                timestamps.extend(chunk_timestamps)
+                ts_buf, ts_idx = _append_timestamps(ts_buf, ts_idx, chunk_timestamps)
         
-        actual_duration = time.time() - start_time
-        drift_stats = analyze_sample_rate_drift(timestamps, nominal_rate, actual_duration) if len(timestamps) >= 10 else {}
+        actual_duration = (now - start_ns) / 1e9
+        drift_stats = analyze_sample_rate_drift(ts_buf[:ts_idx], nominal_rate, actual_duration) if ts_idx >= 10 else {}
         
         results[interval] = {
             'samples_per_sec': samples_received / actual_duration,
@@ -313,38 +586,45 @@ def test_stream_performance(stream_name=stream_name, test_duration=5):
               f"{result['chunks_per_sec']:5.1f} chunks/sec, "
               f"chunk size: {result['avg_chunk_size']:5.1f}{drift_info}")
 
-def measure_sample_rate_drift(stream_name=stream_name, measurement_duration=30):
-    """Comprehensive sample rate drift measurement over longer duration."""
+def measure_sample_rate_drift(stream_name=stream_name, measurement_duration=30, *, inlet=None, nominal_rate=None):
+    """Comprehensive sample rate drift measurement over longer duration.
+    
+    Pass an already open inlet to skip stream discovery and inlet creation.
+    """
     print(f"\n🎯 COMPREHENSIVE SAMPLE RATE DRIFT MEASUREMENT ({measurement_duration}s):")
     
-    target_streams = [s for s in resolve_streams() if s.name() == stream_name]
-    if not target_streams:
+    inlet, nominal_rate = _open_inlet(stream_name, measurement_duration, inlet, nominal_rate)
+    if inlet is None:
         print(f"Stream '{stream_name}' not found")
         return
     
-    inlet = StreamInlet(target_streams[0])
-    nominal_rate = target_streams[0].nominal_srate()
-    
     print(f"  Nominal rate: {nominal_rate} Hz")
     print(f"  Measuring for {measurement_duration} seconds...")
     
-    all_timestamps = []
-    start_time = time.time()
-    end_time = start_time + measurement_duration
+    # Preallocated pull buffer is scratch space; only timestamps are needed here
+    max_samples = _chunk_max_samples(nominal_rate)
+    data_buf = _pull_buffer(inlet.channel_count, max_samples, inlet.channel_format)
+    
+    # Running moments keep memory constant however long the measurement runs
+    moments = _new_drift_moments()
     
-    # Collect timestamps with minimal processing overhead
-    while time.time() < end_time:
-        samples, timestamps = inlet.pull_chunk(timeout=0.1, max_samples=1000)
-        if samples:
-            all_timestamps.extend(timestamps)
+    # Collect timestamps with minimal processing overhead; no terminal I/O inside the loop.
+    # Elevated scheduling keeps our own scheduler jitter out of the measurement.
+    with _realtime_priority():
+        start_ns = time.monotonic_ns()
+        deadline = start_ns + int(measurement_duration * 1e9)
+        while (now := time.monotonic_ns()) < deadline:
+            _, timestamps = inlet.pull_chunk(timeout=target_interval, max_samples=max_samples, dest_obj=data_buf)
+            if timestamps:
+                _update_drift_moments(moments, timestamps)
     
-    actual_duration = time.time() - start_time
+    actual_duration = (now - start_ns) / 1e9
     
-    if len(all_timestamps) >= 100:
-        drift_stats = analyze_sample_rate_drift(all_timestamps, nominal_rate, actual_duration)
+    if moments['n_samples'] >= 100:
+        drift_stats = analyze_drift_moments(moments, nominal_rate)
         
         print(f"\n📊 DRIFT MEASUREMENT RESULTS:")
-        print(f"  Samples collected: {len(all_timestamps)}")
+        print(f"  Samples collected: {moments['n_samples']}")
         print(f"  Measurement duration: {actual_duration:.2f} seconds")
         print(f"  Nominal sample rate: {drift_stats['nominal_rate']} Hz")
         print(f"  Actual mean rate: {drift_stats['actual_mean_rate']:.6f} Hz")
@@ -376,15 +656,25 @@ if __name__ == "__main__":
         print(f"\n🎉 Stream connection successful!")
         print(f"Channel names: {channel_names}")
         
-        # Collect basic statistics with drift analysis
-        print_stream_statistics(stream_name, duration=10)
+        # Share one inlet across all measurements instead of re-resolving the stream each time.
+        # The full info returned above carries no network address, so resolve once more here;
+        # if the stream vanished, inlet is None and each measurement looks it up itself.
+        inlet, nominal_rate = _open_inlet(stream_name, 60)
         
-        # Optional: Run detailed performance test
-        print("\n" + "="*50)
-        test_stream_performance(stream_name, test_duration=3)
-        
-        # Optional: Comprehensive drift measurement
-        print("\n" + "="*50)
-        measure_sample_rate_drift(stream_name, measurement_duration=10)
+        try:
+            # Collect basic statistics with drift analysis
+            print_stream_statistics(stream_name, duration=10, inlet=inlet, nominal_rate=nominal_rate)
+            
+            # Optional: Run detailed performance test
+            print("\n" + "="*50)
+            test_stream_performance(stream_name, test_duration=3, inlet=inlet, nominal_rate=nominal_rate)
+            
+            # Optional: Comprehensive drift measurement
+            print("\n" + "="*50)
+            measure_sample_rate_drift(stream_name, measurement_duration=10, inlet=inlet, nominal_rate=nominal_rate)
+        finally:
+            # Release the shared inlet even if a measurement fails or is interrupted
+            if inlet is not None:
+                inlet.close_stream()
     else:
         print(f"\n💥 Failed to connect to stream")
\ No newline at end of file
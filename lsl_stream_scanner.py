@@ -1,6 +1,14 @@
 # lsl_stream_scanner.py
 from pylsl import resolve_streams, StreamInlet
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import sys
 import time
+import traceback
+import xml.etree.ElementTree as ET
+
+# Samples requested by the connection test's chunk pull
+test_chunk_size = 5
 
 def scan_lsl_streams():
     """
@@ -21,30 +29,58 @@ def scan_lsl_streams():
         
         stream_data = []
         
-        for i, stream_info in enumerate(streams):
-            print(f"📊 STREAM #{i+1}")
-            print("-" * 40)
-            
-            stream_metadata = extract_stream_metadata(stream_info, i)
-            stream_data.append(stream_metadata)
+        # Scanning is I/O bound (inlet handshakes, pull timeouts), so streams are
+        # probed concurrently; each worker buffers its own report and the reports
+        # are printed here in discovery order
+        with ThreadPoolExecutor(max_workers=min(8, len(streams))) as executor:
+            futures = [executor.submit(scan_stream, stream_info, i)
+                       for i, stream_info in enumerate(streams)]
             
-            # Try to connect for real-time data verification
-            test_stream_connection(stream_info)
-            
-            print()  # Empty line between streams
+            for future in futures:
+                stream_metadata, lines = future.result()
+                stream_data.append(stream_metadata)
+                # One write per stream report, followed by an empty line between streams
+                sys.stdout.write('\n'.join(lines) + '\n\n')
         
         return stream_data
         
     except Exception as e:
         print(f"❌ Error during stream scanning: {e}")
-        import traceback
         traceback.print_exc()
         return []
 
-def extract_stream_metadata(stream_info, stream_index):
+def scan_stream(stream_info, stream_index):
+    """
+    Collect metadata and connection test for one stream, returning (metadata, report lines)
+    """
+    lines = [f"📊 STREAM #{stream_index+1}", "-" * 40]
+    
+    # One inlet serves both the metadata read and the connection test,
+    # saving a second handshake per stream. max_buflen=1 keeps the outlet from
+    # queueing more than about a second of data for this short-lived inlet.
+    try:
+        inlet = StreamInlet(stream_info, max_buflen=1, processing_flags=0)
+    except Exception:
+        inlet = None  # Let each helper try on its own and report the failure
+    
+    stream_metadata = extract_stream_metadata(stream_info, stream_index, inlet, out=lines)
+    
+    # Try to connect for real-time data verification
+    test_stream_connection(stream_info, inlet, out=lines)
+    
+    if inlet is not None:
+        inlet.close_stream()
+    
+    return stream_metadata, lines
+
+def extract_stream_metadata(stream_info, stream_index, inlet=None, out=None):
     """
     Extract comprehensive metadata from an LSL stream
+    
+    An open inlet may be passed in to reuse its connection; it is left open.
+    Report lines are appended to `out` if given, otherwise printed.
     """
+    lines = [] if out is None else out
     metadata = {
         'index': stream_index,
         'name': stream_info.name(),
@@ -63,119 +99,115 @@ def extract_stream_metadata(stream_info, stream_index):
     }
     
     # Display basic info
-    print(f"  Name: {metadata['name']}")
-    print(f"  Type: {metadata['type']}")
-    print(f"  Channels: {metadata['channel_count']}")
-    print(f"  Sample Rate: {metadata['nominal_srate']} Hz")
-    print(f"  Source ID: {metadata['source_id']}")
-    print(f"  Hostname: {metadata['hostname']}")
-    print(f"  Protocol Version: {metadata['version']}")
-    print(f"  Created: {time.ctime(metadata['created_at'])}")
-    print(f"  UID: {metadata['uid']}")
-    print(f"  Session ID: {metadata['session_id']}")
+    lines.append(f"  Name: {metadata['name']}")
+    lines.append(f"  Type: {metadata['type']}")
+    lines.append(f"  Channels: {metadata['channel_count']}")
+    lines.append(f"  Sample Rate: {metadata['nominal_srate']} Hz")
+    lines.append(f"  Source ID: {metadata['source_id']}")
+    lines.append(f"  Hostname: {metadata['hostname']}")
+    lines.append(f"  Protocol Version: {metadata['version']}")
+    lines.append(f"  Created: {time.ctime(metadata['created_at'])}")
+    lines.append(f"  UID: {metadata['uid']}")
+    lines.append(f"  Session ID: {metadata['session_id']}")
     
     # Try to get detailed info by creating an inlet
+    owns_inlet = inlet is None
     try:
-        inlet = StreamInlet(stream_info, max_buflen=1, processing_flags=0)
+        if owns_inlet:
+            inlet = StreamInlet(stream_info, max_buflen=1, processing_flags=0)
         info = inlet.info()
         
+        # Serialize the header once and parse it in Python, instead of walking
+        # the tree node by node through liblsl
+        root = ET.fromstring(info.as_xml())
+        
         # Get channel details
-        desc = info.desc()
-        channels = desc.child("channels")
+        channels = root.find('desc/channels')
         
-        if not channels.empty():
-            print(f"  📋 Channel Details:")
-            channel = channels.first_child()
-            ch_idx = 0
+        if channels is not None:
+            lines.append(f"  📋 Channel Details:")
             
-            while not channel.empty():
-                # Channel label
-                name_node = channel.child("label")
-                channel_name = f"Channel_{ch_idx}"
-                if not name_node.empty():
-                    name_val = name_node.first_child()
-                    if not name_val.empty():
-                        channel_name = name_val.value()
-                        metadata['channel_names'].append(channel_name)
-                
-                # Channel unit
-                unit_node = channel.child("unit")
-                channel_unit = "unknown"
-                if not unit_node.empty():
-                    unit_val = unit_node.first_child()
-                    if not unit_val.empty():
-                        channel_unit = unit_val.value()
-                        metadata['channel_units'].append(channel_unit)
+            for ch_idx, channel in enumerate(channels.findall('channel')):
+                channel_name = channel.findtext('label')
+                if channel_name:
+                    metadata['channel_names'].append(channel_name)
+                else:
+                    channel_name = f"Channel_{ch_idx}"
                 
-                # Channel type
-                type_node = channel.child("type")
-                channel_type = "unknown"
-                if not type_node.empty():
-                    type_val = type_node.first_child()
-                    if not type_val.empty():
-                        channel_type = type_val.value()
+                channel_unit = channel.findtext('unit')
+                if channel_unit:
+                    metadata['channel_units'].append(channel_unit)
+                else:
+                    channel_unit = "unknown"
                 
-                print(f"    {ch_idx:2d}: {channel_name:15} [{channel_unit:8}] ({channel_type})")
+                channel_type = channel.findtext('type') or "unknown"
                 
-                channel = channel.next_sibling()
-                ch_idx += 1
+                lines.append(f"    {ch_idx:2d}: {channel_name:15} [{channel_unit:8}] ({channel_type})")
         
         # Get additional metadata
-        print(f"  🔧 Additional Metadata:")
+        lines.append(f"  🔧 Additional Metadata:")
         metadata_fields = [
             "manufacturer", "model", "subject", "session", "experiment",
             "description", "serial_number", "firmware_version", "hardware_version"
         ]
         
         for field in metadata_fields:
-            node = desc.child(field)
-            if not node.empty():
-                value_node = node.first_child()
-                if not value_node.empty():
-                    field_value = value_node.value()
-                    metadata['additional_metadata'][field] = field_value
-                    print(f"    {field.replace('_', ' ').title()}: {field_value}")
+            field_value = root.findtext(f'desc/{field}')
+            if field_value:
+                metadata['additional_metadata'][field] = field_value
+                lines.append(f"    {field.replace('_', ' ').title()}: {field_value}")
         
         if not metadata['additional_metadata']:
-            print("    No additional metadata available")
+            lines.append("    No additional metadata available")
             
-        inlet.close()
+        if owns_inlet:
+            inlet.close_stream()
         
     except Exception as e:
-        print(f"  ⚠️  Could not retrieve detailed metadata: {e}")
+        lines.append(f"  ⚠️  Could not retrieve detailed metadata: {e}")
+    
+    if out is None:
+        sys.stdout.write('\n'.join(lines) + '\n')
     
     return metadata
 
-def test_stream_connection(stream_info):
+def test_stream_connection(stream_info, inlet=None, out=None):
     """
     Test if we can actually receive data from the stream
+    
+    An open inlet may be passed in to reuse its connection; it is left open.
+    Report lines are appended to `out` if given, otherwise printed.
     """
-    print(f"  🔄 Connection Test:")
+    lines = [] if out is None else out
+    lines.append(f"  🔄 Connection Test:")
     
+    owns_inlet = inlet is None
     try:
         # Create inlet with short timeout
-        inlet = StreamInlet(stream_info, max_buflen=1, processing_flags=0)
+        if owns_inlet:
+            inlet = StreamInlet(stream_info, max_buflen=1, processing_flags=0)
         
-        # Try to get a single sample
-        sample, timestamp = inlet.pull_sample(timeout=2.0)
+        # One chunk pull both proves data is flowing and shows its shape
+        samples, timestamps = inlet.pull_chunk(timeout=2.0, max_samples=test_chunk_size)
         
-        if sample is not None:
-            print(f"    ✅ SUCCESS - Received {len(sample)} channel sample")
-            print(f"       First 5 values: {sample[:5]}")
-            print(f"       Timestamp: {timestamp:.6f}")
-            
-            # Try to get a chunk of data
-            samples, timestamps = inlet.pull_chunk(timeout=1.0, max_samples=5)
-            if samples:
-                print(f"       Chunk test: {len(samples)} samples received")
+        if timestamps:
+            sample = samples[0]
+            lines.append(f"    ✅ SUCCESS - Received {len(sample)} channel sample")
+            lines.append(f"       First 5 values: {sample[:5]}")
+            lines.append(f"       Timestamp: {timestamps[0]:.6f}")
+            lines.append(f"       Chunk test: {len(timestamps)} samples received")
             
         else:
-            print(f"    ⚠️  No data received (stream might be inactive)")
+            lines.append(f"    ⚠️  No data received (stream might be inactive)")
         
-        inlet.close()
+        if owns_inlet:
+            inlet.close_stream()
         
     except Exception as e:
-        print(f"    ❌ Connection failed: {e}")
+        lines.append(f"    ❌ Connection failed: {e}")
+    
+    if out is None:
+        sys.stdout.write('\n'.join(lines) + '\n')
 
 def print_stream_summary(stream_data):
     """
@@ -184,50 +216,74 @@ def print_stream_summary(stream_data):
     if not stream_data:
         return
     
-    print("\n" + "=" * 80)
-    print("📈 STREAM SUMMARY")
-    print("=" * 80)
+    out = ["\n" + "=" * 80, "📈 STREAM SUMMARY", "=" * 80]
     
-    print(f"{'#':<2} {'Name':<20} {'Type':<15} {'Channels':<8} {'Rate (Hz)':<10} {'Status':<10}")
-    print("-" * 80)
+    out.append(f"{'#':<2} {'Name':<20} {'Type':<15} {'Channels':<8} {'Rate (Hz)':<10} {'Status':<10}")
+    out.append("-" * 80)
     
     for stream in stream_data:
         status = "✅ Active" if stream.get('channel_names') else "⚠️  Limited"
         rate = stream['nominal_srate']
         rate_str = f"{rate:.1f}" if rate > 0 else "Irregular"
         
-        print(f"{stream['index']+1:<2} {stream['name']:<20} {stream['type']:<15} "
-              f"{stream['channel_count']:<8} {rate_str:<10} {status:<10}")
+        out.append(f"{stream['index']+1:<2} {stream['name']:<20} {stream['type']:<15} "
+                   f"{stream['channel_count']:<8} {rate_str:<10} {status:<10}")
+    
+    sys.stdout.write('\n'.join(out) + '\n')
 
-def continuous_monitor(scan_interval=5.0, duration=30.0):
+def _stream_signature(uids):
+    """Order-independent digest of a set of stream uids, cheap to compare between scans."""
+    return hashlib.blake2b('\n'.join(sorted(uids)).encode(), digest_size=8).digest()
+
+def continuous_monitor(scan_interval=5.0, duration=30.0, max_interval=30.0, stable_after=None):
     """
     Continuously monitor for stream changes
+    
+    Streams are tracked by uid, since several hosts may publish the same name.
+    Once the stream set has been stable for `stable_after` seconds (default:
+    three scan intervals) the poll interval doubles on each scan, up to
+    `max_interval`; any change resets it. The last sleep is cut short at `duration`.
     """
     print(f"\n🔄 Continuous Monitoring (every {scan_interval}s for {duration}s)")
     print("Press Ctrl+C to stop monitoring")
     
+    if stable_after is None:
+        stable_after = 3 * scan_interval
+    
     start_time = time.time()
-    previous_streams = set()
+    previous_streams = {}
+    previous_sig = _stream_signature([])
+    last_change = start_time
+    interval = scan_interval
     
     try:
         while time.time() - start_time < duration:
-            current_streams = resolve_streams()
-            current_names = {s.name() for s in current_streams}
+            streams = resolve_streams()
+            uids = [s.uid() for s in streams]
+            sig = _stream_signature(uids)
             
-            if current_names != previous_streams:
+            # Names are only fetched and diffed when the uid set actually changed
+            if sig != previous_sig:
+                current_streams = {uid: s.name() for uid, s in zip(uids, streams)}
+                
                 print(f"\n⏰ {time.strftime('%H:%M:%S')} - Stream changes detected!")
                 
-                new_streams = current_names - previous_streams
-                gone_streams = previous_streams - current_names
+                new_streams = current_streams.keys() - previous_streams.keys()
+                gone_streams = previous_streams.keys() - current_streams.keys()
                 
                 if new_streams:
-                    print(f"   ➕ New streams: {', '.join(new_streams)}")
+                    print(f"   ➕ New streams: {', '.join(current_streams[uid] for uid in new_streams)}")
                 if gone_streams:
-                    print(f"   ➖ Gone streams: {', '.join(gone_streams)}")
+                    print(f"   ➖ Gone streams: {', '.join(previous_streams[uid] for uid in gone_streams)}")
                 
-                previous_streams = current_names
+                previous_streams = current_streams
+                previous_sig = sig
+                last_change = time.time()
+                interval = scan_interval
+            elif time.time() - last_change > stable_after:
+                interval = min(interval * 2, max_interval)
             
-            time.sleep(scan_interval)
+            time.sleep(min(interval, max(0.0, duration - (time.time() - start_time))))
             
     except KeyboardInterrupt:
         print("\n⏹️  Monitoring stopped by user")
@@ -258,8 +314,6 @@ def quick_scan():
         print(f"❌ Scan error: {e}")
 
 if __name__ == "__main__":
-    import sys
-    
     # Check for quick scan option
     if len(sys.argv) > 1 and sys.argv[1] in ['-q', '--quick']:
         quick_scan()
@@ -1,6 +1,12 @@
+import re
 import numpy as np
 import time
-from pylsl import StreamInfo, StreamOutlet, local_clock
+from pylsl import StreamInfo, StreamOutlet, local_clock, __version__ as pylsl_version
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the vectorized numpy path is used instead
+    njit = None
 
 # -------------------------------------------------------
 # CONFIGURATION (SynAmps-like)
@@ -12,6 +18,16 @@ stream_name = "SynAmpsRT"
 stream_type = "EEG"
 manufacturer = "Compumedics Neuroscan"
 model = "SynAmps RT"
+seed = None  # Set an int to make the generated noise reproducible across runs
+
+# Signal model: alpha + beta rhythms plus white noise
+alpha_freq = 10  # Hz
+beta_freq = 20   # Hz
+# Amplitudes (µV), hoisted as float32 scalars so the in-place ops never upcast or rebox them
+alpha_amp = np.float32(20)
+beta_amp = np.float32(10)
+noise_amp = np.float32(5)
+renormalize_every = 500  # Chunks between magnitude corrections of the phasors
 
 # Typical 32-channel SynAmps / 10-20 naming
 channel_labels = [
@@ -22,106 +38,153 @@ channel_labels = [
 ]
 
 # -------------------------------------------------------
-# CREATE LSL STREAMINFO WITH METADATA
+# OPTIONAL JIT KERNEL
 # -------------------------------------------------------
-info = StreamInfo(stream_name, stream_type, n_channels, sfreq, 'float32', "synamps1234")
-
-# Add metadata (very SynAmps-like)
-desc = info.desc()
-desc.append_child_value("manufacturer", manufacturer)
-desc.append_child_value("model", model)
-
-# Channel descriptors
-ch = desc.append_child("channels")
-for name in channel_labels:
-    c = ch.append_child("channel")
-    c.append_child_value("label", name)
-    c.append_child_value("unit", "microvolts")
-    c.append_child_value("type", "EEG")
-
-# -------------------------------------------------------
-# CREATE OUTLET
-# -------------------------------------------------------
-outlet = StreamOutlet(info, chunk_size)
-
-print(">>> Synthetic 32-ch SynAmps LSL stream is LIVE...")
-print(">>> Name :", stream_name)
-print(">>> Type :", stream_type)
-print(">>> Fs   :", sfreq)
-print(">>> Chunk size:", chunk_size)
-print(">>> Target rate: 1000 samples/sec")
-print(">>> Use any LSL viewer (LabRecorder, MNE-LSL, etc.) to see it.\n")
+# One fused pass over the chunk, no temporaries
+fill_eeg = None
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def fill_eeg(out, alpha_z, beta_z, alpha_steps, beta_steps, noise):
+        for t_idx in range(out.shape[0]):
+            a_step = alpha_steps[t_idx]
+            b_step = beta_steps[t_idx]
+            for ch_id in range(out.shape[1]):
+                out[t_idx, ch_id] = (alpha_amp * (a_step * alpha_z[ch_id]).imag
+                                     + beta_amp * (b_step * beta_z[ch_id]).imag
+                                     + noise_amp * noise[t_idx, ch_id])
 
 # -------------------------------------------------------
-# PERFORMANCE OPTIMIZATIONS
+# LSL STREAMINFO WITH METADATA
 # -------------------------------------------------------
-# Pre-allocate arrays
-timepoints_template = np.arange(chunk_size) / sfreq
-eeg_data = np.zeros((chunk_size, n_channels), dtype='float32')
-
-# Pre-compute phase increments
-alpha_freq = 10  # Hz
-beta_freq = 20   # Hz
-alpha_phase_inc = 2 * np.pi * alpha_freq / sfreq
-beta_phase_inc = 2 * np.pi * beta_freq / sfreq
+def make_info(n_channels=n_channels, sfreq=sfreq):
+    """Build the SynAmps-like StreamInfo, with channel metadata, for an outlet."""
+    info = StreamInfo(stream_name, stream_type, n_channels, sfreq, 'float32', "synamps1234")
+    
+    # Add metadata (very SynAmps-like)
+    desc = info.desc()
+    desc.append_child_value("manufacturer", manufacturer)
+    desc.append_child_value("model", model)
+    
+    # Channel descriptors; channels beyond the 10-20 set are numbered
+    ch = desc.append_child("channels")
+    for idx in range(n_channels):
+        c = ch.append_child("channel")
+        c.append_child_value("label", channel_labels[idx] if idx < len(channel_labels) else f"Ch{idx + 1}")
+        c.append_child_value("unit", "microvolts")
+        c.append_child_value("type", "EEG")
+    
+    return info
 
 # -------------------------------------------------------
-# HIGH-PRECISION TIMING LOOP
+# STREAMING
 # -------------------------------------------------------
-sample_count = 0
-start_time = time.perf_counter()
-next_chunk_time = start_time
-alpha_phase = 0.0
-beta_phase = 0.0
-
-print(">>> Starting stream with precise timing control...")
-
-try:
-    while True:
-        current_time = time.perf_counter()
-        
-        # Wait until it's time for the next chunk
-        if current_time < next_chunk_time:
-            time.sleep(max(0, next_chunk_time - current_time - 0.001))  # Small buffer
-            continue
+def run_stream(n_channels=n_channels, sfreq=sfreq, chunk_size=chunk_size):
+    """Stream synthetic EEG at sfreq until interrupted with Ctrl+C."""
+    # Numpy chunks go to liblsl as one buffer only from pylsl 1.13 on
+    if tuple(int(part) for part in re.findall(r"\d+", pylsl_version)[:2]) < (1, 13):
+        raise RuntimeError(f"pylsl >= 1.13 is required, found {pylsl_version} (pip install -U pylsl)")
+    
+    outlet = StreamOutlet(make_info(n_channels, sfreq), chunk_size)
+    
+    print(f">>> Synthetic {n_channels}-ch SynAmps LSL stream is LIVE...")
+    print(">>> Name :", stream_name)
+    print(">>> Type :", stream_type)
+    print(">>> Fs   :", sfreq)
+    print(">>> Chunk size:", chunk_size)
+    print(f">>> Target rate: {sfreq} samples/sec")
+    print(">>> Use any LSL viewer (LabRecorder, MNE-LSL, etc.) to see it.\n")
+    
+    # Pre-allocate every buffer the loop writes into; each iteration fills them in place,
+    # so the streaming loop allocates no arrays and leaves nothing for the GC
+    eeg_data = np.empty((chunk_size, n_channels), dtype=np.float32)
+    beta_data = np.empty_like(eeg_data)
+    noise_data = np.empty_like(eeg_data)
+    phasor_data = np.empty((chunk_size, n_channels), dtype=np.complex64)
+    phasor_imag = phasor_data.imag  # Writable view, created once
+    
+    # Pre-compute phase increments
+    alpha_phase_inc = 2 * np.pi * alpha_freq / sfreq
+    beta_phase_inc = 2 * np.pi * beta_freq / sfreq
+    
+    # Rotating phasors replace sin(): the signal is imag(step[t] * z[ch]), and z advances by one
+    # chunk's rotation per iteration, so no transcendental calls happen in the loop.
+    # Per-sample rotations within a chunk:
+    alpha_steps = np.exp(1j * alpha_phase_inc * np.arange(chunk_size)).astype(np.complex64)
+    beta_steps = np.exp(1j * beta_phase_inc * np.arange(chunk_size)).astype(np.complex64)
+    alpha_step_col = alpha_steps[:, None]  # Column views for broadcasting against channels
+    beta_step_col = beta_steps[:, None]
+    # Rotation from one chunk to the next:
+    alpha_advance = np.exp(1j * alpha_phase_inc * chunk_size)
+    beta_advance = np.exp(1j * beta_phase_inc * chunk_size)
+    # Current phasor per channel, starting at the channel-specific phase offsets. Kept in
+    # complex64 like the steps, so the per-chunk products run entirely in float32 precision;
+    # the advance stays complex128 and is rounded into the state once per chunk.
+    alpha_z = np.exp(1j * np.arange(n_channels) * 0.1).astype(np.complex64)
+    beta_z = np.exp(1j * np.arange(n_channels) * 0.05).astype(np.complex64)
+    
+    rng = np.random.default_rng(seed)  # PCG64; fills float32 buffers in place
+    
+    # High-precision timing state
+    sample_count = 0
+    n_chunks = 0
+    sample_period = 1.0 / sfreq
+    start_time = time.perf_counter()
+    start_stamp = local_clock()  # LSL time of sample 0; sample i is stamped start_stamp + i / sfreq
+    
+    print(">>> Starting stream with precise timing control...")
+    
+    try:
+        while True:
+            # Generate synthetic EEG for the whole chunk at once (samples x channels)
+            rng.standard_normal(out=noise_data, dtype=np.float32)
+            if fill_eeg is not None:
+                fill_eeg(eeg_data, alpha_z, beta_z, alpha_steps, beta_steps, noise_data)
+            else:
+                np.multiply(alpha_step_col, alpha_z, out=phasor_data)
+                np.multiply(phasor_imag, alpha_amp, out=eeg_data)
+                np.multiply(beta_step_col, beta_z, out=phasor_data)
+                np.multiply(phasor_imag, beta_amp, out=beta_data)
+                np.add(eeg_data, beta_data, out=eeg_data)
+                np.multiply(noise_data, noise_amp, out=noise_data)
+                np.add(eeg_data, noise_data, out=eeg_data)
             
-        # Generate synthetic EEG for this chunk
-        for ch_id in range(n_channels):
-            # Channel-specific phase offsets
-            ch_alpha_phase = alpha_phase + ch_id * 0.1
-            ch_beta_phase = beta_phase + ch_id * 0.05
+            # Sleep until the chunk's last sample is due; the deadline is absolute, so
+            # wake-up jitter never accumulates, and the explicit timestamp hides it from receivers
+            next_count = sample_count + chunk_size
+            next_chunk_time = start_time + next_count * sample_period
+            remaining = next_chunk_time - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
             
-            # Generate the signal for this channel across all timepoints in chunk
-            for t_idx in range(chunk_size):
-                global_time = sample_count + t_idx
-                alpha_val = 20 * np.sin(ch_alpha_phase + alpha_phase_inc * global_time)
-                beta_val = 10 * np.sin(ch_beta_phase + beta_phase_inc * global_time)
-                noise_val = np.random.normal(0, 5)
-                eeg_data[t_idx, ch_id] = alpha_val + beta_val + noise_val
-        
-        # Push the chunk with precise timestamp
-        outlet.push_chunk(eeg_data.tolist())
-        
-        # Update counters
-        sample_count += chunk_size
-        alpha_phase += alpha_phase_inc * chunk_size
-        beta_phase += beta_phase_inc * chunk_size
-        
-        # Schedule next chunk precisely
-        next_chunk_time = start_time + (sample_count / sfreq)
-        
-        # Performance monitoring
-        if sample_count % 5000 == 0:  # Report every 5 seconds of data
-            elapsed = time.perf_counter() - start_time
-            actual_rate = sample_count / elapsed
-            drift = (actual_rate - sfreq) / sfreq * 100
-            print(f"Rate: {actual_rate:.1f} Hz ({drift:+.2f}% drift)")
+            # Push the C-contiguous float32 chunk directly; no per-value Python float boxing.
+            # Stamp it with the nominal time of its last sample so receivers see exact spacing.
+            outlet.push_chunk(eeg_data, timestamp=start_stamp + (next_count - 1) * sample_period)
             
-except KeyboardInterrupt:
-    total_time = time.perf_counter() - start_time
-    final_rate = sample_count / total_time
-    print(f"\n>>> Stream stopped.")
-    print(f">>> Final rate: {final_rate:.1f} samples/sec")
-    print(f">>> Target rate: {sfreq} samples/sec")
-    print(f">>> Duration: {total_time:.2f} seconds")
-    print(f">>> Total samples: {sample_count}")
\ No newline at end of file
+            # Update counters
+            sample_count = next_count
+            n_chunks += 1
+            alpha_z *= alpha_advance
+            beta_z *= beta_advance
+            if n_chunks % renormalize_every == 0:
+                # Keep rounding error from slowly changing the amplitude
+                alpha_z /= np.abs(alpha_z)
+                beta_z /= np.abs(beta_z)
+            
+            # Performance monitoring
+            if sample_count % 5000 == 0:  # Report every 5 seconds of data
+                elapsed = time.perf_counter() - start_time
+                actual_rate = sample_count / elapsed
+                drift = (actual_rate - sfreq) / sfreq * 100
+                print(f"Rate: {actual_rate:.1f} Hz ({drift:+.2f}% drift)")
+            
+    except KeyboardInterrupt:
+        total_time = time.perf_counter() - start_time
+        final_rate = sample_count / total_time
+        print(f"\n>>> Stream stopped.")
+        print(f">>> Final rate: {final_rate:.1f} samples/sec")
+        print(f">>> Target rate: {sfreq} samples/sec")
+        print(f">>> Duration: {total_time:.2f} seconds")
+        print(f">>> Total samples: {sample_count}")
+
+if __name__ == "__main__":
+    run_stream()
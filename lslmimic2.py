@@ -1,73 +1,103 @@
-from pylsl import StreamInfo, StreamOutlet
+from pylsl import StreamInfo, StreamOutlet, local_clock, __version__ as pylsl_version
 import numpy as np
+import re
 import time
-import random
 
-# -----------------------------
-# EEG STREAM (SynAmps-style)
-# -----------------------------
 n_channels = 32
 sfreq = 1000  # SynAmps RT typical sampling rate (250, 500, 1000 Hz supported)
+chunk_size = 50  # Samples generated and pushed per iteration
+seed = None  # set an int to make the mock EEG and marker timing reproducible
 
-info = StreamInfo(
-    name='SynAmps_RT_EEG',
-    type='EEG',
-    channel_count=n_channels,
-    nominal_srate=sfreq,
-    channel_format='float32',
-    source_id='synamps_rt_mock_01'
-)
-
-# Add XML metadata (Curry-like)
-channels = info.desc().append_child("channels")
-default_labels = [
-    "Fp1","Fp2","F7","F3","Fz","F4","F8",
-    "T3","C3","Cz","C4","T4",
-    "T5","P3","Pz","P4","T6",
-    "O1","Oz","O2",
-] + [f"EX{i}" for i in range(32-20)]  # mock extra channels
-
-for ch in default_labels:
-    ch_info = channels.append_child("channel")
-    ch_info.append_child_value("label", ch)
-    ch_info.append_child_value("type", "EEG")
-    ch_info.append_child_value("unit", "uV")
-
-outlet = StreamOutlet(info)
+# -----------------------------
+# EEG STREAM (SynAmps-style)
+# -----------------------------
+def make_info(n_channels=n_channels, sfreq=sfreq):
+    """Build the mock EEG StreamInfo with Curry-like channel metadata."""
+    info = StreamInfo(
+        name='SynAmps_RT_EEG',
+        type='EEG',
+        channel_count=n_channels,
+        nominal_srate=sfreq,
+        channel_format='float32',
+        source_id='synamps_rt_mock_01'
+    )
+    
+    # Add XML metadata (Curry-like)
+    channels = info.desc().append_child("channels")
+    default_labels = [
+        "Fp1","Fp2","F7","F3","Fz","F4","F8",
+        "T3","C3","Cz","C4","T4",
+        "T5","P3","Pz","P4","T6",
+        "O1","Oz","O2",
+    ] + [f"EX{i}" for i in range(n_channels-20)]  # mock extra channels
+    
+    for ch in default_labels[:n_channels]:
+        ch_info = channels.append_child("channel")
+        ch_info.append_child_value("label", ch)
+        ch_info.append_child_value("type", "EEG")
+        ch_info.append_child_value("unit", "uV")
+    
+    return info
 
 # -----------------------------------
 # MARKER STREAM (optional)
 # -----------------------------------
-marker_info = StreamInfo(
-    'SynAmps_RT_Markers',
-    'Markers',
-    1,
-    0,            # irregular sampling rate
-    'string',
-    'synamps_rt_markers_01'
-)
-marker_outlet = StreamOutlet(marker_info)
-
-print("Mock SynAmps RT EEG + Marker LSL stream started…")
-print("Press Ctrl+C to stop.")
+def make_marker_info():
+    """Build the irregular-rate string marker StreamInfo."""
+    return StreamInfo(
+        'SynAmps_RT_Markers',
+        'Markers',
+        1,
+        0,            # irregular sampling rate
+        'string',
+        'synamps_rt_markers_01'
+    )
 
 # -----------------------------------
 # STREAMING LOOP
 # -----------------------------------
-sample_interval = 1.0 / sfreq
-
-try:
-    while True:
-        # generate mock EEG sample
-        sample = np.random.randn(n_channels).astype(np.float32) * 5.0  # ~5 µV noise
-        
-        outlet.push_sample(sample)
-        
-        # occasional marker
-        if random.random() < 0.001:   # ~1 marker per second
-            marker_outlet.push_sample(["Stimulus"])
-        
-        time.sleep(sample_interval)
+def run_stream(n_channels=n_channels, sfreq=sfreq, chunk_size=chunk_size):
+    """Stream mock EEG plus ~1 Hz markers until interrupted with Ctrl+C."""
+    # numpy chunks go to liblsl as one buffer only from pylsl 1.13 on
+    if tuple(int(part) for part in re.findall(r"\d+", pylsl_version)[:2]) < (1, 13):
+        raise RuntimeError(f"pylsl >= 1.13 is required, found {pylsl_version} (pip install -U pylsl)")
+    
+    outlet = StreamOutlet(make_info(n_channels, sfreq), chunk_size)
+    marker_outlet = StreamOutlet(make_marker_info())
+    
+    print("Mock SynAmps RT EEG + Marker LSL stream started…")
+    print("Press Ctrl+C to stop.")
+    
+    rng = np.random.default_rng(seed)
+    buf = np.empty((chunk_size, n_channels), dtype=np.float32)
+    marker_chance = chunk_size / sfreq  # ~1 marker per second
+    
+    sample_count = 0
+    start_time = time.perf_counter()
+    start_stamp = local_clock()  # LSL time of sample 0
+    
+    try:
+        while True:
+            # generate a chunk of mock EEG samples
+            rng.standard_normal(dtype=np.float32, out=buf)
+            buf *= 5.0  # ~5 µV noise
+            
+            # pace against an absolute deadline so sleep jitter never accumulates into drift
+            deadline = start_time + (sample_count + chunk_size) / sfreq
+            remaining = deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            
+            # stamp with the nominal time of the chunk's last sample
+            outlet.push_chunk(buf, timestamp=start_stamp + (sample_count + chunk_size - 1) / sfreq)
+            sample_count += chunk_size
+            
+            # occasional marker
+            if rng.random() < marker_chance:
+                marker_outlet.push_sample(["Stimulus"])
+    
+    except KeyboardInterrupt:
+        print("Stopped mock SynAmps stream.")
 
-except KeyboardInterrupt:
-    print("Stopped mock SynAmps stream.")
+if __name__ == "__main__":
+    run_stream()